@@ -5,40 +5,91 @@ Analysis engine for CryptoVerde
 import pandas as pd
 import logging
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger("CryptoVerde.Analysis")
 
+# Fill values for missing numeric data
+_DEFAULTS = {
+    'market_cap_rank': 999,
+    'price_change_24h': 0.0,
+    'current_price': 0,
+    'market_cap': 0,
+    'total_volume': 0,
+    'volatility_score': 0
+}
+
+# Below this many rows thread dispatch costs more than the rankings
+_PARALLEL_MIN_ROWS = 1000
+
+def _top_n(df, col, n, cols, largest=True):
+    """Select the top n rows by col, ties kept in row order like nlargest(keep='first')"""
+    vals = df[col].to_numpy(dtype=np.float64)
+    if largest:
+        vals = -vals
+    
+    k = min(n, len(vals))
+    if k <= 0:
+        return df[cols].iloc[:0]
+    
+    if k < len(vals):
+        # Partition finds the k-th value in O(n); rows tied with it are taken in row order
+        kth = np.partition(vals, k - 1)[k - 1]
+        inside = np.flatnonzero(vals < kth)
+        at_cut = np.flatnonzero(np.isnan(vals) if np.isnan(kth) else vals == kth)
+        idx = np.concatenate((inside, at_cut[:k - len(inside)]))
+    else:
+        idx = np.arange(len(vals))
+    idx = idx[np.argsort(vals[idx], kind='stable')]
+    
+    return df.iloc[idx, df.columns.get_indexer(cols)]
+
 class AnalysisEngine:
     """Performs data analysis"""
     
     def __init__(self, db_manager):
         self.db = db_manager
+        # (source frame, row count, cleaned frame) of the last clean
+        self._clean_cache = None
+        # (fingerprint, stats) of the last calculate_market_stats call
+        self._stats_cache = None
+    
+    def clear_cache(self):
+        """Drop memoized results after new data arrives"""
+        self._clean_cache = None
+        self._stats_cache = None
     
     def clean_dataframe(self, df):
         """Clean dataframe - remove NaN, fill missing values"""
         if df.empty:
             return df
         
-        df = df.copy()
-        
-        # Define numeric columns
-        numeric_cols = ['current_price', 'market_cap', 'total_volume', 
-                       'price_change_24h', 'volatility_score', 'market_cap_rank']
+        # Reuse the last cleaned frame when called again on the same input
+        cached = self._clean_cache
+        if cached is not None:
+            source, rows, cleaned = cached
+            if df is cleaned or (df is source and len(df) == rows):
+                return cleaned
         
-        # Fill NaN values with appropriate defaults
-        for col in numeric_cols:
-            if col in df.columns:
-                if col == 'market_cap_rank':
-                    df[col] = df[col].fillna(999)
-                elif col == 'price_change_24h':
-                    df[col] = df[col].fillna(0.0)
-                else:
-                    df[col] = df[col].fillna(0)
+        # Fill NaN values with appropriate defaults in a single pass
+        columns = df.columns
+        cleaned = df.fillna(value={col: val for col, val in _DEFAULTS.items() if col in columns})
         
         # Remove any rows with critical missing data
-        df = df.dropna(subset=['coin_id', 'name', 'symbol'])
+        keep = (
+            cleaned['coin_id'].notna().to_numpy()
+            & cleaned['name'].notna().to_numpy()
+            & cleaned['symbol'].notna().to_numpy()
+        )
+        if not keep.all():
+            cleaned = cleaned[keep]
         
-        return df
+        # NaN promotes ranks to float; restore the integer dtype once filled
+        if 'market_cap_rank' in cleaned.columns and cleaned['market_cap_rank'].dtype.kind == 'f':
+            cleaned = cleaned.astype({'market_cap_rank': 'int64'})
+        
+        self._clean_cache = (df, len(df), cleaned)
+        return cleaned
     
     def get_top_gainers(self, df, n=5):
         """Get top gainers"""
@@ -47,14 +98,10 @@ class AnalysisEngine:
                 return pd.DataFrame()
             
             df = self.clean_dataframe(df)
-            result = df.nlargest(n, 'price_change_24h')[
+            return _top_n(
+                df, 'price_change_24h', n,
                 ['name', 'symbol', 'price_change_24h', 'current_price']
-            ].copy()
-            
-            result['price_change_24h'] = result['price_change_24h'].fillna(0)
-            result['current_price'] = result['current_price'].fillna(0)
-            
-            return result
+            )
         except Exception as e:
             logger.error(f"Error in get_top_gainers: {e}")
             return pd.DataFrame()
@@ -66,14 +113,11 @@ class AnalysisEngine:
                 return pd.DataFrame()
             
             df = self.clean_dataframe(df)
-            result = df.nsmallest(n, 'price_change_24h')[
-                ['name', 'symbol', 'price_change_24h', 'current_price']
-            ].copy()
-            
-            result['price_change_24h'] = result['price_change_24h'].fillna(0)
-            result['current_price'] = result['current_price'].fillna(0)
-            
-            return result
+            return _top_n(
+                df, 'price_change_24h', n,
+                ['name', 'symbol', 'price_change_24h', 'current_price'],
+                largest=False
+            )
         except Exception as e:
             logger.error(f"Error in get_top_losers: {e}")
             return pd.DataFrame()
@@ -85,14 +129,10 @@ class AnalysisEngine:
                 return pd.DataFrame()
             
             df = self.clean_dataframe(df)
-            result = df.nlargest(n, 'market_cap')[
+            return _top_n(
+                df, 'market_cap', n,
                 ['name', 'symbol', 'market_cap', 'current_price']
-            ].copy()
-            
-            result['market_cap'] = result['market_cap'].fillna(0)
-            result['current_price'] = result['current_price'].fillna(0)
-            
-            return result
+            )
         except Exception as e:
             logger.error(f"Error in get_top_by_market_cap: {e}")
             return pd.DataFrame()
@@ -104,18 +144,50 @@ class AnalysisEngine:
                 return pd.DataFrame()
             
             df = self.clean_dataframe(df)
-            result = df.nlargest(n, 'volatility_score')[
+            return _top_n(
+                df, 'volatility_score', n,
                 ['name', 'symbol', 'volatility_score', 'price_change_24h']
-            ].copy()
-            
-            result['volatility_score'] = result['volatility_score'].fillna(0)
-            result['price_change_24h'] = result['price_change_24h'].fillna(0)
-            
-            return result
+            )
         except Exception as e:
             logger.error(f"Error in get_most_volatile: {e}")
             return pd.DataFrame()
     
+    def compute_dashboard(self, df, n=5, ranking_n=10):
+        """Compute all dashboard rankings from a single cleaned frame"""
+        df = self.clean_dataframe(df)
+        
+        # Both volatility views rank the same column, select once for both
+        jobs = {
+            'gainers': lambda: self.get_top_gainers(df, n),
+            'losers': lambda: self.get_top_losers(df, n),
+            'top_market_cap': lambda: self.get_top_by_market_cap(df, n),
+            'volatility': lambda: self.get_volatility_ranking(df, max(n, ranking_n))
+        }
+        
+        # NumPy releases the GIL in partition and argsort, so large frames rank concurrently
+        if len(df) < _PARALLEL_MIN_ROWS:
+            results = {key: job() for key, job in jobs.items()}
+        else:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                futures = {key: executor.submit(job) for key, job in jobs.items()}
+                results = {key: future.result() for key, future in futures.items()}
+        
+        ranking = results['volatility']
+        if ranking.empty:
+            most_volatile = ranking
+        else:
+            most_volatile = ranking.iloc[:n][
+                ['name', 'symbol', 'volatility_score', 'price_change_24h']
+            ]
+        
+        return {
+            'gainers': results['gainers'],
+            'losers': results['losers'],
+            'top_market_cap': results['top_market_cap'],
+            'most_volatile': most_volatile,
+            'volatility_ranking': ranking.iloc[:ranking_n]
+        }
+    
     def calculate_market_stats(self, df):
         """Calculate market statistics"""
         default_stats = {
@@ -135,31 +207,53 @@ class AnalysisEngine:
             if df.empty:
                 return default_stats
             
+            # Refreshes between ETL runs see identical data; reuse the stats
+            fingerprint = (
+                len(df),
+                float(df['market_cap'].iloc[0]),
+                df['coin_id'].iloc[-1],
+                float(df['current_price'].iloc[-1])
+            )
+            cached = self._stats_cache
+            if cached is not None and cached[0] == fingerprint:
+                stats = cached[1]
+                return dict(stats, market_dominance=dict(stats['market_dominance']))
+            
             df = self.clean_dataframe(df)
             
+            agg = df.agg({
+                'market_cap': ['sum', 'mean'],
+                'total_volume': 'sum',
+                'current_price': ['mean', 'median'],
+                'volatility_score': 'mean'
+            })
+            change = df['price_change_24h'].to_numpy()
+            
             stats = {
-                'total_market_cap': float(df['market_cap'].sum()),
-                'avg_market_cap': float(df['market_cap'].mean()),
-                'total_volume': float(df['total_volume'].sum()),
-                'avg_price': float(df['current_price'].mean()),
-                'median_price': float(df['current_price'].median()),
+                'total_market_cap': float(agg.at['sum', 'market_cap']),
+                'avg_market_cap': float(agg.at['mean', 'market_cap']),
+                'total_volume': float(agg.at['sum', 'total_volume']),
+                'avg_price': float(agg.at['mean', 'current_price']),
+                'median_price': float(agg.at['median', 'current_price']),
                 'total_coins': len(df),
-                'avg_volatility': float(df['volatility_score'].mean()),
-                'total_gainers': int((df['price_change_24h'] > 0).sum()),
-                'total_losers': int((df['price_change_24h'] < 0).sum()),
+                'avg_volatility': float(agg.at['mean', 'volatility_score']),
+                'total_gainers': int((change > 0).sum()),
+                'total_losers': int((change < 0).sum()),
+                'market_dominance': {}
             }
             
             # Calculate market dominance (top 5)
             if not df.empty and 'market_cap' in df.columns:
                 total = stats['total_market_cap']
                 if total > 0:
-                    top_5 = df.nlargest(5, 'market_cap')
-                    dominance = {}
-                    for _, coin in top_5.iterrows():
-                        dominance[coin['symbol']] = (coin['market_cap'] / total) * 100
-                    stats['market_dominance'] = dominance
+                    top_5 = _top_n(df, 'market_cap', 5, ['symbol', 'market_cap'])
+                    mc = top_5['market_cap'].to_numpy(dtype=np.float64)
+                    stats['market_dominance'] = dict(zip(
+                        top_5['symbol'].tolist(), (mc / total * 100).tolist()
+                    ))
             
-            return stats
+            self._stats_cache = (fingerprint, stats)
+            return dict(stats, market_dominance=dict(stats['market_dominance']))
         except Exception as e:
             logger.error(f"Error calculating stats: {e}")
             return default_stats
@@ -182,14 +276,14 @@ class AnalysisEngine:
             if std == 0 or pd.isna(std):
                 return pd.DataFrame()
             
-            df_copy = df.copy()
-            df_copy['z_score'] = (df_copy[column] - mean) / std
-            df_copy['z_score'] = df_copy['z_score'].fillna(0)
+            # NaN z-scores compare False, so missing values are never flagged
+            z = (df[column].to_numpy(dtype=np.float64) - mean) / std
+            mask = np.abs(z) > threshold
             
-            anomalies = df_copy[abs(df_copy['z_score']) > threshold]
-            
-            if not anomalies.empty:
-                return anomalies[['name', 'symbol', column, 'z_score']].copy()
+            if mask.any():
+                anomalies = df.loc[mask, ['name', 'symbol', column]]
+                anomalies['z_score'] = z[mask]
+                return anomalies
             
             return pd.DataFrame()
         except Exception as e:
@@ -203,15 +297,10 @@ class AnalysisEngine:
                 return pd.DataFrame()
             
             df = self.clean_dataframe(df)
-            result = df.nlargest(n, 'volatility_score')[
+            return _top_n(
+                df, 'volatility_score', n,
                 ['name', 'symbol', 'volatility_score', 'price_change_24h', 'current_price']
-            ].copy()
-            
-            result['volatility_score'] = result['volatility_score'].fillna(0)
-            result['price_change_24h'] = result['price_change_24h'].fillna(0)
-            result['current_price'] = result['current_price'].fillna(0)
-            
-            return result
+            )
         except Exception as e:
             logger.error(f"Error in volatility ranking: {e}")
             return pd.DataFrame()
\ No newline at end of file
@@ -2,12 +2,13 @@
 CoinGecko API handler for CryptoVerde
 """
 
-import requests
 import pandas as pd
 import logging
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import datetime
 from config import Config
-from utils import save_json, format_timestamp
+from utils import format_timestamp, json_loads
 
 logger = logging.getLogger("CryptoVerde.API")
 
@@ -15,28 +16,36 @@ class CoinGeckoAPI:
     """Handles all API interactions"""
     
     def __init__(self):
+        # Deferred so importing this module stays cheap for analysis-only use
+        import requests
         self.session = requests.Session()
-        self.cache = self.load_cache()
+        # (coin_id, days) -> (fetched_at, ohlc), least recently used first
+        self.cache = OrderedDict()
+        self._cache_lock = threading.Lock()
     
-    def load_cache(self):
-        """Load cache from file"""
-        try:
-            import os, json
-            if os.path.exists(Config.CACHE_FILE):
-                with open(Config.CACHE_FILE, 'r') as f:
-                    return json.load(f)
-            return {}
-        except:
-            return {}
+    def _cache_get(self, key):
+        """Return a fresh cached frame or None"""
+        with self._cache_lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            
+            fetched_at, ohlc = entry
+            if datetime.now() - fetched_at >= Config.CACHE_DURATION:
+                del self.cache[key]
+                return None
+            
+            self.cache.move_to_end(key)
+        # Shallow copy: callers adding columns never touch the cached frame
+        return ohlc.copy(deep=False)
     
-    def save_cache(self):
-        """Save cache to file"""
-        try:
-            import json
-            with open(Config.CACHE_FILE, 'w') as f:
-                json.dump(self.cache, f)
-        except:
-            pass
+    def _cache_put(self, key, ohlc):
+        """Store a frame, evicting the least recently used entries"""
+        with self._cache_lock:
+            self.cache[key] = (datetime.now(), ohlc)
+            self.cache.move_to_end(key)
+            while len(self.cache) > Config.CACHE_MAX_ENTRIES:
+                self.cache.popitem(last=False)
     
     def get_top_coins(self):
         """Fetch top 100 coins"""
@@ -50,11 +59,11 @@ class CoinGeckoAPI:
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = json_loads(response.content)
             logger.info(f"✅ Got {len(data)} coins")
             
-            # Save raw data
-            self.save_raw_data(data)
+            # Save raw response as received
+            self.save_raw_data(response.content)
             
             return data
         except Exception as e:
@@ -65,11 +74,10 @@ class CoinGeckoAPI:
         """Get historical price data"""
         try:
             # Check cache
-            cache_key = f"{coin_id}_{days}"
-            if cache_key in self.cache:
-                cache_time = datetime.fromisoformat(self.cache[cache_key]['time'])
-                if datetime.now() - cache_time < timedelta(minutes=5):
-                    return pd.DataFrame(self.cache[cache_key]['data'])
+            cache_key = (coin_id, days)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
             
             url = Config.COINGECKO_HISTORICAL.format(coin_id)
             params = {
@@ -79,61 +87,54 @@ class CoinGeckoAPI:
             
             response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
             
             # Process data
             ohlc = self._process_historical_data(data, days)
             
             # Cache results
-            self.cache[cache_key] = {
-                'time': datetime.now().isoformat(),
-                'data': ohlc.to_dict()
-            }
-            self.save_cache()
+            self._cache_put(cache_key, ohlc)
             
-            return ohlc
+            return ohlc.copy(deep=False)
         except Exception as e:
             logger.error(f"❌ Historical error: {e}")
             return None
     
     def _process_historical_data(self, data, days):
         """Process raw historical data into OHLC"""
-        # Price data
-        prices = data['prices']
-        df = pd.DataFrame(prices, columns=['timestamp', 'price'])
+        # Prices and volumes stacked row-wise; each side leaves the other's column NaN,
+        # which ohlc and sum skip, so repeated timestamps never pair up
+        df = pd.DataFrame(data['prices'], columns=['timestamp', 'price'])
+        if 'total_volumes' in data:
+            vol_df = pd.DataFrame(data['total_volumes'], columns=['timestamp', 'volume'])
+            df = pd.concat([df, vol_df], ignore_index=True)
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
         df.set_index('timestamp', inplace=True)
         
         # Create OHLC based on timeframe
         if days <= 7:
-            ohlc = df['price'].resample('1H').ohlc()
+            rule = '1h'
         elif days <= 30:
-            ohlc = df['price'].resample('4H').ohlc()
+            rule = '4h'
         else:
-            ohlc = df['price'].resample('1D').ohlc()
+            rule = '1D'
         
-        ohlc = ohlc.dropna()
+        # One resample pass over the shared bin edges
+        agg = {'price': 'ohlc'}
+        if 'volume' in df.columns:
+            agg['volume'] = 'sum'
+        ohlc = df.resample(rule).agg(agg)
+        ohlc.columns = ohlc.columns.droplevel(0)
         
-        # Add volume data
-        if 'total_volumes' in data:
-            volumes = data['total_volumes']
-            vol_df = pd.DataFrame(volumes, columns=['timestamp', 'volume'])
-            vol_df['timestamp'] = pd.to_datetime(vol_df['timestamp'], unit='ms')
-            vol_df.set_index('timestamp', inplace=True)
-            
-            if days <= 7:
-                ohlc['volume'] = vol_df['volume'].resample('1H').sum()
-            elif days <= 30:
-                ohlc['volume'] = vol_df['volume'].resample('4H').sum()
-            else:
-                ohlc['volume'] = vol_df['volume'].resample('1D').sum()
+        ohlc = ohlc.dropna(subset=['open', 'high', 'low', 'close'])
         
         return ohlc
     
-    def save_raw_data(self, data):
-        """Save raw API data for logging"""
+    def save_raw_data(self, content):
+        """Save raw API response bytes for logging"""
         try:
             filename = f"{Config.RAW_DATA_DIR}/raw_{format_timestamp()}.json"
-            save_json(data, filename)
+            with open(filename, 'wb') as f:
+                f.write(content)
         except Exception as e:
             logger.error(f"Failed to save raw data: {e}")
\ No newline at end of file
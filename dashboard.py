@@ -3,13 +3,14 @@ Dashboard UI for CryptoVerde
 """
 
 import streamlit as st
-import pandas as pd
+import numpy as np
 import time
 import logging
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from streamlit_autorefresh import st_autorefresh
 from database import DatabaseManager
 from api_handler import CoinGeckoAPI
 from analysis_engine import AnalysisEngine
@@ -18,14 +19,110 @@ from config import Config
 
 logger = logging.getLogger("CryptoVerde.Dashboard")
 
+# Shared across reruns and sessions so clients and connections are built once
+@st.cache_resource
+def get_db():
+    """Shared database manager"""
+    return DatabaseManager()
+
+@st.cache_resource
+def get_api():
+    """Shared CoinGecko client"""
+    return CoinGeckoAPI()
+
+@st.cache_resource
+def get_analysis():
+    """Shared analysis engine"""
+    return AnalysisEngine(get_db())
+
+@st.cache_resource
+def get_indicators():
+    """Shared indicator calculator"""
+    return TechnicalIndicators()
+
+@st.cache_data(ttl=Config.DASHBOARD_REFRESH_SECONDS, show_spinner=False)
+def _load_market_frame():
+    """Fetch, clean and summarize the latest market snapshot"""
+    coins = get_db().get_coins()
+    if coins.empty:
+        return coins, {}
+    
+    analysis = get_analysis()
+    # Text columns arrive from get_coins already Arrow-backed
+    df = analysis.clean_dataframe(coins)
+    # Sorted once per snapshot so reruns can slice the leaders directly
+    df = df.sort_values('market_cap', ascending=False, ignore_index=True)
+    return df, analysis.calculate_market_stats(df)
+
+@st.cache_data(ttl=Config.DASHBOARD_REFRESH_SECONDS, show_spinner=False)
+def _to_csv(data):
+    """CSV export bytes, cached on the frame's contents"""
+    return data.to_csv(index=False).encode()
+
+def _downsample_ohlc(ohlc, target=2000):
+    """Merge candles so at most about target bars reach the browser"""
+    if len(ohlc) <= target:
+        return ohlc
+    
+    rule = ((ohlc.index[-1] - ohlc.index[0]) / target).ceil('min')
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+    if 'volume' in ohlc.columns:
+        agg['volume'] = 'sum'
+    
+    return ohlc.resample(rule).agg(agg).dropna(subset=['close'])
+
+class _ChartUnavailable(Exception):
+    """Raised from the cached chart builder so Streamlit doesn't store the miss"""
+    
+    def __init__(self, has_history):
+        super().__init__("chart unavailable")
+        self.has_history = has_history
+
+# Held as a resource: the figure is only read, so hits skip pickling thousands of points
+@st.cache_resource(ttl=Config.CACHE_DURATION, show_spinner=False)
+def _chart_figure(_dashboard, coin_id, coin_name, days):
+    """Build the main chart for a coin; raises _ChartUnavailable when it can't"""
+    historical = _dashboard.api.get_historical_data(coin_id, days)
+    if historical is None or len(historical) <= 5:
+        raise _ChartUnavailable(has_history=False)
+    fig = _dashboard.create_chart(historical, coin_name)
+    if fig is None:
+        raise _ChartUnavailable(has_history=True)
+    return fig, True
+
+@st.cache_data(ttl=Config.DASHBOARD_REFRESH_SECONDS, show_spinner=False)
+def _bar_figure(data, y, title, color_scale=None):
+    """Ranking bar chart, cached on the ranking's contents"""
+    return px.bar(
+        data,
+        x='name',
+        y=y,
+        color=y,
+        color_continuous_scale=color_scale,
+        title=title
+    )
+
+@st.cache_data(ttl=Config.DASHBOARD_REFRESH_SECONDS, show_spinner=False)
+def _volatility_scatter(data):
+    """Volatility vs price change scatter, cached on its contents"""
+    return px.scatter(
+        data,
+        x='volatility_score',
+        y='price_change_24h',
+        size='current_price',
+        color='price_change_24h',
+        hover_name='name',
+        title="Volatility vs Price Change"
+    )
+
 class CryptoDashboard:
     """Professional Streamlit Dashboard"""
     
     def __init__(self):
-        self.db = DatabaseManager()
-        self.api = CoinGeckoAPI()
-        self.analysis = AnalysisEngine(self.db)
-        self.indicators = TechnicalIndicators()
+        self.db = get_db()
+        self.api = get_api()
+        self.analysis = get_analysis()
+        self.indicators = get_indicators()
         
         # Page config
         st.set_page_config(
@@ -70,6 +167,11 @@ class CryptoDashboard:
             padding: 1rem;
             margin: 0.5rem;
         }
+        .card-row {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(0, 1fr));
+            gap: 1rem;
+        }
         </style>
         """, unsafe_allow_html=True)
     
@@ -79,7 +181,8 @@ class CryptoDashboard:
             if ohlc_data is None or ohlc_data.empty:
                 return None
             
-            ohlc = self.indicators.add_all_indicators(ohlc_data.copy())
+            ohlc = _downsample_ohlc(ohlc_data)
+            ohlc = self.indicators.add_all_indicators(ohlc)
             trend, trend_color = self.indicators.detect_trend(ohlc)
             
             fig = make_subplots(
@@ -113,7 +216,7 @@ class CryptoDashboard:
             # Moving Averages
             if 'SMA_20' in ohlc.columns and not ohlc['SMA_20'].isna().all():
                 fig.add_trace(
-                    go.Scatter(
+                    go.Scattergl(
                         x=ohlc.index,
                         y=ohlc['SMA_20'],
                         name='SMA 20',
@@ -124,7 +227,7 @@ class CryptoDashboard:
             
             if 'SMA_50' in ohlc.columns and not ohlc['SMA_50'].isna().all():
                 fig.add_trace(
-                    go.Scatter(
+                    go.Scattergl(
                         x=ohlc.index,
                         y=ohlc['SMA_50'],
                         name='SMA 50',
@@ -135,8 +238,10 @@ class CryptoDashboard:
             
             # Volume
             if 'volume' in ohlc.columns:
-                colors = ['#10B981' if ohlc['close'].iloc[i] >= ohlc['open'].iloc[i] 
-                         else '#EF4444' for i in range(len(ohlc))]
+                colors = np.where(
+                    ohlc['close'].to_numpy() >= ohlc['open'].to_numpy(),
+                    '#10B981', '#EF4444'
+                )
                 
                 fig.add_trace(
                     go.Bar(
@@ -152,7 +257,7 @@ class CryptoDashboard:
             # MACD
             if all(col in ohlc.columns for col in ['MACD', 'MACD_signal', 'MACD_histogram']):
                 fig.add_trace(
-                    go.Scatter(
+                    go.Scattergl(
                         x=ohlc.index,
                         y=ohlc['MACD'],
                         name='MACD',
@@ -162,7 +267,7 @@ class CryptoDashboard:
                 )
                 
                 fig.add_trace(
-                    go.Scatter(
+                    go.Scattergl(
                         x=ohlc.index,
                         y=ohlc['MACD_signal'],
                         name='Signal',
@@ -171,8 +276,10 @@ class CryptoDashboard:
                     row=3, col=1
                 )
                 
-                hist_colors = ['#10B981' if x >= 0 else '#EF4444' 
-                              for x in ohlc['MACD_histogram'].fillna(0)]
+                hist_colors = np.where(
+                    ohlc['MACD_histogram'].fillna(0).to_numpy() >= 0,
+                    '#10B981', '#EF4444'
+                )
                 fig.add_trace(
                     go.Bar(
                         x=ohlc.index,
@@ -187,7 +294,7 @@ class CryptoDashboard:
             # RSI
             if 'RSI' in ohlc.columns:
                 fig.add_trace(
-                    go.Scatter(
+                    go.Scattergl(
                         x=ohlc.index,
                         y=ohlc['RSI'],
                         name='RSI',
@@ -207,7 +314,9 @@ class CryptoDashboard:
                 showlegend=True,
                 legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
                 title=f"{coin_name} - Technical Analysis [{trend}]",
-                title_x=0.5
+                title_x=0.5,
+                hovermode='x unified',
+                spikedistance=-1
             )
             
             return fig
@@ -215,53 +324,28 @@ class CryptoDashboard:
             logger.error(f"Error creating chart: {e}")
             return None
     
+    @staticmethod
+    def render_card_row(cards):
+        """Render a row of HTML cards as a single markdown element"""
+        st.markdown(f'<div class="card-row">{"".join(cards)}</div>', unsafe_allow_html=True)
+    
     def render_kpi_cards(self, stats):
         """Render KPI cards"""
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="stat-card">
-                <h3>💰 Total Market Cap</h3>
-                <div style="font-size: 1.8rem; font-weight: bold;">
-                    ${stats['total_market_cap']/1e12:.2f}T
-                </div>
-                <div class="positive">↑ Active: {stats['total_coins']} coins</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class="stat-card">
-                <h3>📊 24h Volume</h3>
-                <div style="font-size: 1.8rem; font-weight: bold;">
-                    ${stats['total_volume']/1e9:.2f}B
-                </div>
-                <div>Gainers: {stats['total_gainers']} | Losers: {stats['total_losers']}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="stat-card">
-                <h3>💵 Average Price</h3>
-                <div style="font-size: 1.8rem; font-weight: bold;">
-                    ${stats['avg_price']:,.2f}
-                </div>
-                <div>Median: ${stats['median_price']:,.2f}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown(f"""
-            <div class="stat-card">
-                <h3>⚡ Avg Volatility</h3>
-                <div style="font-size: 1.8rem; font-weight: bold;">
-                    {stats['avg_volatility']:,.0f}
-                </div>
-                <div>Volatility Score</div>
-            </div>
-            """, unsafe_allow_html=True)
+        value_style = 'style="font-size: 1.8rem; font-weight: bold;"'
+        self.render_card_row([
+            f'<div class="stat-card"><h3>💰 Total Market Cap</h3>'
+            f'<div {value_style}>${stats["total_market_cap"]/1e12:.2f}T</div>'
+            f'<div class="positive">↑ Active: {stats["total_coins"]} coins</div></div>',
+            f'<div class="stat-card"><h3>📊 24h Volume</h3>'
+            f'<div {value_style}>${stats["total_volume"]/1e9:.2f}B</div>'
+            f'<div>Gainers: {stats["total_gainers"]} | Losers: {stats["total_losers"]}</div></div>',
+            f'<div class="stat-card"><h3>💵 Average Price</h3>'
+            f'<div {value_style}>${stats["avg_price"]:,.2f}</div>'
+            f'<div>Median: ${stats["median_price"]:,.2f}</div></div>',
+            f'<div class="stat-card"><h3>⚡ Avg Volatility</h3>'
+            f'<div {value_style}>{stats["avg_volatility"]:,.0f}</div>'
+            f'<div>Volatility Score</div></div>',
+        ])
     
     def run(self):
         """Main dashboard runner"""
@@ -280,8 +364,9 @@ class CryptoDashboard:
             if st.button("🔄 SYNC MARKET DATA", use_container_width=True):
                 with st.spinner("Fetching live data..."):
                     from etl_pipeline import ETLPipeline
-                    etl = ETLPipeline()
+                    etl = ETLPipeline(api=self.api, db=self.db, analysis=self.analysis)
                     if etl.run():
+                        st.cache_data.clear()
                         st.success("✅ Data synced successfully!")
                         time.sleep(1)
                         st.rerun()
@@ -296,23 +381,17 @@ class CryptoDashboard:
             st.markdown("---")
             st.markdown("### 📈 Market Stats")
         
-        # Get data
-        coins = self.db.get_coins()
+        # Get cleaned data and stats, refreshed at most once per TTL window
+        df, stats = _load_market_frame()
         
-        if not coins:
+        if df.empty:
+            # Don't keep serving the empty snapshot until the TTL expires
+            _load_market_frame.clear()
             st.warning("⏳ No data available. Click 'SYNC MARKET DATA' to start.")
             if auto_refresh:
-                time.sleep(5)
-                st.rerun()
+                st_autorefresh(interval=5000, key="market_refresh_empty")
             return
         
-        # Convert to DataFrame and clean
-        df = pd.DataFrame(coins)
-        df = self.analysis.clean_dataframe(df)
-        
-        # Calculate stats
-        stats = self.analysis.calculate_market_stats(df)
-        
         # KPI Cards
         self.render_kpi_cards(stats)
         
@@ -321,49 +400,53 @@ class CryptoDashboard:
         # Market Dominance
         if stats['market_dominance']:
             st.markdown("### 🏆 Market Dominance")
-            dom_cols = st.columns(len(stats['market_dominance']))
-            for idx, (symbol, percentage) in enumerate(stats['market_dominance'].items()):
-                with dom_cols[idx]:
-                    st.markdown(f"""
-                    <div class="trading-card" style="text-align: center;">
-                        <h3>{symbol}</h3>
-                        <h2>{percentage:.1f}%</h2>
-                    </div>
-                    """, unsafe_allow_html=True)
+            self.render_card_row([
+                f'<div class="trading-card" style="text-align: center;">'
+                f'<h3>{symbol}</h3><h2>{percentage:.1f}%</h2></div>'
+                for symbol, percentage in stats['market_dominance'].items()
+            ])
         
         st.markdown("---")
         
         # Top Coins
         st.markdown("### 🔥 Top 10 Cryptocurrencies")
-        top_10 = df.nlargest(10, 'market_cap')[['name', 'symbol', 'current_price', 'price_change_24h', 'market_cap']]
+        top_10 = df.head(10)[['name', 'symbol', 'current_price', 'price_change_24h', 'market_cap']]
         
-        cols = st.columns(5)
-        for idx, (_, coin) in enumerate(top_10.head(5).iterrows()):
-            with cols[idx]:
-                change_class = "positive" if coin['price_change_24h'] >= 0 else "negative"
-                st.markdown(f"""
-                <div class="trading-card">
-                    <h4>{coin['name']}</h4>
-                    <p style="color: #718096;">{coin['symbol']}</p>
-                    <h3>${coin['current_price']:,.2f}</h3>
-                    <p class="{change_class}">{coin['price_change_24h']:+.2f}%</p>
-                </div>
-                """, unsafe_allow_html=True)
+        self.render_card_row([
+            f'<div class="trading-card"><h4>{coin["name"]}</h4>'
+            f'<p style="color: #718096;">{coin["symbol"]}</p>'
+            f'<h3>${coin["current_price"]:,.2f}</h3>'
+            f'<p class="{"positive" if coin["price_change_24h"] >= 0 else "negative"}">'
+            f'{coin["price_change_24h"]:+.2f}%</p></div>'
+            for coin in top_10.head(5).to_dict('records')
+        ])
         
         st.markdown("---")
         
         # Main Chart
         st.markdown("### 📈 Advanced Charting")
         
-        coin_options = [f"{row['name']} ({row['symbol']})" for _, row in df.iterrows()]
-        selected = st.selectbox("Select Cryptocurrency", coin_options, index=0)
-        selected_coin = df[df['name'] == selected.split(' (')[0]].iloc[0]
+        # Select by coin_id so the choice follows the coin across re-sorted refreshes,
+        # with a coin_id -> row position map for a direct lookup instead of a scan
+        coin_ids = df['coin_id'].tolist()
+        labels = dict(zip(coin_ids, (df['name'] + ' (' + df['symbol'] + ')').tolist()))
+        positions = {coin_id: pos for pos, coin_id in enumerate(coin_ids)}
+        selected = st.selectbox(
+            "Select Cryptocurrency", coin_ids, index=0,
+            format_func=labels.__getitem__
+        )
+        selected_coin = df.iloc[positions[selected]]
         
         with st.spinner("Loading chart data..."):
-            historical = self.api.get_historical_data(selected_coin['coin_id'], days)
+            # Failed fetches or charts raise, so only this coin retries on the next run
+            try:
+                fig, has_history = _chart_figure(
+                    self, selected_coin['coin_id'], selected_coin['name'], days
+                )
+            except _ChartUnavailable as e:
+                fig, has_history = None, e.has_history
             
-            if historical is not None and len(historical) > 5:
-                fig = self.create_chart(historical, selected_coin['name'])
+            if has_history:
                 if fig:
                     st.plotly_chart(fig, use_container_width=True)
                     
@@ -384,59 +467,47 @@ class CryptoDashboard:
         
         st.markdown("---")
         
-        # Analysis Tabs
-        tab1, tab2, tab3, tab4 = st.tabs([
+        # Analysis views: only the selected one is computed and rendered
+        views = [
             "📊 Market Movers",
             "⚡ Volatility Analysis",
             "📈 Top Gainers/Losers",
             "📋 Complete Data"
-        ])
+        ]
+        view = st.radio(
+            "Analysis view", views, horizontal=True,
+            label_visibility="collapsed", key="analysis_view"
+        )
         
-        with tab1:
+        # Rankings for the chart views, computed once per refresh
+        if view != views[3]:
+            rankings = self.analysis.compute_dashboard(df, n=10, ranking_n=20)
+        
+        if view == views[0]:
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("#### 🚀 Top 10 Gainers")
-                gainers = self.analysis.get_top_gainers(df, 10)
+                gainers = rankings['gainers']
                 if not gainers.empty:
-                    fig = px.bar(
-                        gainers,
-                        x='name',
-                        y='price_change_24h',
-                        color='price_change_24h',
-                        color_continuous_scale='RdYlGn',
-                        title="Top Gainers (24h)"
-                    )
+                    fig = _bar_figure(gainers, 'price_change_24h', "Top Gainers (24h)", 'RdYlGn')
                     st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 st.markdown("#### 📉 Top 10 Losers")
-                losers = self.analysis.get_top_losers(df, 10)
+                losers = rankings['losers']
                 if not losers.empty:
-                    fig = px.bar(
-                        losers,
-                        x='name',
-                        y='price_change_24h',
-                        color='price_change_24h',
-                        color_continuous_scale='RdYlGn_r',
-                        title="Top Losers (24h)"
-                    )
+                    fig = _bar_figure(losers, 'price_change_24h', "Top Losers (24h)", 'RdYlGn_r')
                     st.plotly_chart(fig, use_container_width=True)
         
-        with tab2:
+        elif view == views[1]:
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("#### ⚡ Most Volatile")
-                volatile = self.analysis.get_most_volatile(df, 10)
+                volatile = rankings['most_volatile']
                 if not volatile.empty:
-                    fig = px.bar(
-                        volatile,
-                        x='name',
-                        y='volatility_score',
-                        color='volatility_score',
-                        title="Volatility Ranking"
-                    )
+                    fig = _bar_figure(volatile, 'volatility_score', "Volatility Ranking")
                     st.plotly_chart(fig, use_container_width=True)
             
             with col2:
@@ -447,61 +518,47 @@ class CryptoDashboard:
                 else:
                     st.info("No anomalies detected")
         
-        with tab3:
+        elif view == views[2]:
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("#### 📈 Top by Market Cap")
-                top_mcap = self.analysis.get_top_by_market_cap(df, 10)
+                top_mcap = rankings['top_market_cap']
                 if not top_mcap.empty:
-                    fig = px.bar(
-                        top_mcap,
-                        x='name',
-                        y='market_cap',
-                        color='market_cap',
-                        title="Largest by Market Cap"
-                    )
+                    fig = _bar_figure(top_mcap, 'market_cap', "Largest by Market Cap")
                     st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 st.markdown("#### 📊 Volatility vs Price Change")
-                vol_df = self.analysis.get_volatility_ranking(df, 20)
+                vol_df = rankings['volatility_ranking']
                 if not vol_df.empty:
-                    fig = px.scatter(
-                        vol_df,
-                        x='volatility_score',
-                        y='price_change_24h',
-                        size='current_price',
-                        color='price_change_24h',
-                        hover_name='name',
-                        title="Volatility vs Price Change"
-                    )
+                    fig = _volatility_scatter(vol_df)
                     st.plotly_chart(fig, use_container_width=True)
         
-        with tab4:
+        else:
             st.markdown("#### 📋 Complete Market Data")
             
             display_df = df[[
                 'name', 'symbol', 'current_price', 'price_change_24h',
                 'market_cap', 'total_volume', 'volatility_score', 'market_cap_rank'
-            ]].copy()
-            
-            # Format columns
-            display_df['current_price'] = display_df['current_price'].apply(lambda x: f"${x:,.2f}")
-            display_df['price_change_24h'] = display_df['price_change_24h'].apply(lambda x: f"{x:+.2f}%")
-            display_df['market_cap'] = display_df['market_cap'].apply(lambda x: f"${x:,.0f}")
-            display_df['total_volume'] = display_df['total_volume'].apply(lambda x: f"${x:,.0f}")
-            display_df['volatility_score'] = display_df['volatility_score'].apply(lambda x: f"{x:,.0f}")
-            
-            display_df.columns = [
+            ]].set_axis([
                 'Name', 'Symbol', 'Price', '24h %',
                 'Market Cap', 'Volume', 'Volatility', 'Rank'
-            ]
+            ], axis=1)
+            
+            # Format columns at render time, values stay numeric
+            styled = display_df.style.format({
+                'Price': '${:,.2f}',
+                '24h %': '{:+.2f}%',
+                'Market Cap': '${:,.0f}',
+                'Volume': '${:,.0f}',
+                'Volatility': '{:,.0f}'
+            })
             
-            st.dataframe(display_df, use_container_width=True, height=500)
+            st.dataframe(styled, use_container_width=True, height=500)
             
-            # Export
-            csv = display_df.to_csv(index=False)
+            # Export, serialized once per snapshot rather than every rerun
+            csv = _to_csv(display_df)
             st.download_button(
                 label="📥 Download CSV",
                 data=csv,
@@ -518,7 +575,6 @@ class CryptoDashboard:
         </div>
         """, unsafe_allow_html=True)
         
-        # Auto-refresh
+        # Auto-refresh on a browser-side timer so the script thread isn't held
         if auto_refresh:
-            time.sleep(Config.DASHBOARD_REFRESH_SECONDS)
-            st.rerun()
\ No newline at end of file
+            st_autorefresh(interval=Config.DASHBOARD_REFRESH_SECONDS * 1000, key="market_refresh")
\ No newline at end of file
@@ -16,48 +16,38 @@ class DataProcessor:
         if not raw_data:
             return []
         
-        processed = []
         timestamp = datetime.now().isoformat()
+        df = pd.DataFrame(raw_data).reindex(columns=[
+            'id', 'symbol', 'name', 'current_price', 'market_cap',
+            'total_volume', 'price_change_percentage_24h', 'market_cap_rank'
+        ])
         
-        for coin in raw_data:
-            try:
-                coin_id = str(coin.get('id', ''))
-                if not coin_id:
-                    continue
-                
-                symbol = str(coin.get('symbol', '')).upper() or 'UNKNOWN'
-                name = str(coin.get('name', '')) or 'Unknown'
-                
-                # Handle numeric fields
-                current_price = float(coin.get('current_price') or 0)
-                market_cap = int(coin.get('market_cap') or 0)
-                volume = int(coin.get('total_volume') or 0)
-                price_change_24h = float(coin.get('price_change_percentage_24h') or 0)
-                market_cap_rank = int(coin.get('market_cap_rank') or 999)
-                
-                # Feature engineering: volatility score
-                try:
-                    volatility = abs(price_change_24h) * volume / 1_000_000
-                    if pd.isna(volatility):
-                        volatility = 0.0
-                except:
-                    volatility = 0.0
-                
-                processed.append({
-                    'coin_id': coin_id,
-                    'symbol': symbol,
-                    'name': name,
-                    'current_price': current_price,
-                    'market_cap': market_cap,
-                    'total_volume': volume,
-                    'price_change_24h': price_change_24h,
-                    'market_cap_rank': market_cap_rank,
-                    'volatility_score': volatility,
-                    'extracted_at': timestamp
-                })
-            except Exception as e:
-                logger.warning(f"⚠️ Skipped {coin.get('name', 'unknown')}: {e}")
-                continue
+        # Coins without an id can't be upserted
+        coin_id = df['id'].fillna('').astype(str)
+        valid = coin_id != ''
+        if not valid.all():
+            logger.warning(f"⚠️ Skipped {int((~valid).sum())} coins without an id")
+            df = df[valid]
+            coin_id = coin_id[valid]
         
+        # Handle numeric fields
+        volume = pd.to_numeric(df['total_volume'], errors='coerce').fillna(0).astype('int64')
+        price_change_24h = pd.to_numeric(df['price_change_percentage_24h'], errors='coerce').fillna(0.0)
+        
+        processed = pd.DataFrame({
+            'coin_id': coin_id,
+            'symbol': df['symbol'].fillna('').astype(str).str.upper().replace('', 'UNKNOWN'),
+            'name': df['name'].fillna('').astype(str).replace('', 'Unknown'),
+            'current_price': pd.to_numeric(df['current_price'], errors='coerce').fillna(0.0),
+            'market_cap': pd.to_numeric(df['market_cap'], errors='coerce').fillna(0).astype('int64'),
+            'total_volume': volume,
+            'price_change_24h': price_change_24h,
+            'market_cap_rank': pd.to_numeric(df['market_cap_rank'], errors='coerce').fillna(999).astype('int64'),
+            # Feature engineering: volatility score
+            'volatility_score': price_change_24h.abs() * volume / 1_000_000,
+            'extracted_at': timestamp
+        })
+        
+        processed = processed.to_dict('records')
         logger.info(f"✅ Processed {len(processed)} coins")
         return processed
\ No newline at end of file
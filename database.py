@@ -3,14 +3,43 @@ Database manager for CryptoVerde
 """
 
 import logging
+import threading
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
 from supabase import create_client
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
 
 logger = logging.getLogger("CryptoVerde.DB")
 
+# Columns written by DataProcessor; anything else in the table isn't read
+COIN_COLUMNS = (
+    "coin_id,symbol,name,current_price,market_cap,total_volume,"
+    "price_change_24h,market_cap_rank,volatility_score,extracted_at"
+)
+
+# Text columns stay Arrow-backed instead of one Python object per cell
+_ARROW_TYPES = {pa.string(): pd.StringDtype("pyarrow")}
+
+# One Supabase client per process so every manager reuses its pooled connections
+_client = None
+_client_lock = threading.Lock()
+
+def _shared_client():
+    """Create the Supabase client on first use and return it afterwards"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if not Config.SUPABASE_URL or not Config.SUPABASE_KEY:
+                raise RuntimeError(
+                    "SUPABASE_URL and SUPABASE_KEY must be set in the environment "
+                    "or in .streamlit/secrets.toml"
+                )
+            _client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+        return _client
+
 class DatabaseManager:
     """Handles all database operations"""
     
@@ -20,7 +49,7 @@ class DatabaseManager:
     def connect(self):
         """Establish database connection"""
         try:
-            self.supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+            self.supabase = _shared_client()
             self.table = "crypto_market"
             logger.info("✅ Database connected")
         except Exception as e:
@@ -43,10 +72,22 @@ class DatabaseManager:
             if not coins_data:
                 return False
             
+            size = Config.UPSERT_BATCH_SIZE
+            batches = [coins_data[i:i + size] for i in range(0, len(coins_data), size)]
+            
             with self.get_connection() as conn:
-                conn.table(self.table)\
-                    .upsert(coins_data, on_conflict='coin_id')\
-                    .execute()
+                def upsert(batch):
+                    return conn.table(self.table)\
+                        .upsert(batch, on_conflict='coin_id')\
+                        .execute()
+                
+                # Overlap serialization and round-trips when there are several batches
+                if len(batches) == 1:
+                    upsert(batches[0])
+                else:
+                    workers = min(Config.UPSERT_WORKERS, len(batches))
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        list(executor.map(upsert, batches))
                 
                 logger.info(f"✅ Saved {len(coins_data)} coins")
                 return True
@@ -55,21 +96,18 @@ class DatabaseManager:
             return False
     
     def get_coins(self):
-        """Get latest coins"""
+        """Get latest coins as a DataFrame"""
         try:
             with self.get_connection() as conn:
                 result = conn.table(self.table)\
-                    .select("*")\
+                    .select(COIN_COLUMNS)\
                     .order("extracted_at", desc=True)\
                     .execute()
                 
-                # Get unique coins
-                seen = {}
-                for coin in result.data:
-                    if coin['coin_id'] not in seen:
-                        seen[coin['coin_id']] = coin
-                
-                return list(seen.values())
+                # Upserts on coin_id keep one row per coin, no dedup needed.
+                # Arrow builds the columns in one pass rather than pandas walking each dict
+                table = pa.Table.from_pylist(result.data)
+                return table.to_pandas(types_mapper=_ARROW_TYPES.get)
         except Exception as e:
             logger.error(f"❌ Fetch failed: {e}")
-            return []
\ No newline at end of file
+            return pd.DataFrame()
\ No newline at end of file
@@ -15,11 +15,11 @@ logger = logging.getLogger("CryptoVerde.ETL")
 class ETLPipeline:
     """Orchestrates the ETL process"""
     
-    def __init__(self):
-        self.api = CoinGeckoAPI()
+    def __init__(self, api=None, db=None, analysis=None):
+        self.api = api or CoinGeckoAPI()
         self.processor = DataProcessor()
-        self.db = DatabaseManager()
-        self.analysis = AnalysisEngine(self.db)
+        self.db = db or DatabaseManager()
+        self.analysis = analysis or AnalysisEngine(self.db)
     
     def run(self):
         """Run complete ETL pipeline"""
@@ -51,13 +51,14 @@ class ETLPipeline:
             if success:
                 logger.info(f"✅ ETL COMPLETED in {elapsed:.2f}s")
                 
-                # Show stats
-                coins = self.db.get_coins()
-                if coins:
-                    df = pd.DataFrame(coins)
-                    stats = self.analysis.calculate_market_stats(df)
-                    logger.info(f"📊 Total Market Cap: ${stats['total_market_cap']:,.0f}")
-                    logger.info(f"📊 Active Coins: {stats['total_coins']}")
+                # New rows landed, cached analysis results are stale
+                self.analysis.clear_cache()
+                
+                # Show stats from the rows just saved, no need to read them back
+                df = pd.DataFrame(transformed)
+                stats = self.analysis.calculate_market_stats(df)
+                logger.info(f"📊 Total Market Cap: ${stats['total_market_cap']:,.0f}")
+                logger.info(f"📊 Active Coins: {stats['total_coins']}")
                 
                 return True
             else:
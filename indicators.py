@@ -5,72 +5,164 @@ Technical indicators for CryptoVerde
 import pandas as pd
 import numpy as np
 import logging
+import math
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from indicators_numba import NUMBA_AVAILABLE, compute_all, _rolling_mean, _ema, _rsi
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # optional, ewm is used instead
+    lfilter = None
+
+try:
+    from bottleneck import move_mean
+except ImportError:  # optional, rolling().mean() is used instead
+    move_mean = None
 
 logger = logging.getLogger("CryptoVerde.Indicators")
 
+# Column order of the arrays returned by compute_all
+_FUSED_COLUMNS = ('SMA_20', 'SMA_50', 'EMA_12', 'EMA_26', 'MACD', 'MACD_signal', 'MACD_histogram', 'RSI')
+
+# Last-row values read by detect_trend, in unpacking order
+_TREND_COLUMNS = ('close', 'SMA_20', 'SMA_50', 'RSI')
+
+def _trend_label(price_vs_sma20, sma20_vs_sma50, rsi_vs_50):
+    """Trend rules on the signs (-1, 0, 1) of the three comparisons"""
+    if price_vs_sma20 > 0 and sma20_vs_sma50 > 0 and rsi_vs_50 > 0:
+        return "STRONG UPTREND 🔥", "#4CAF50"
+    if price_vs_sma20 > 0:
+        return "UPTREND 📈", "#8BC34A"
+    if price_vs_sma20 < 0 and sma20_vs_sma50 < 0 and rsi_vs_50 < 0:
+        return "STRONG DOWNTREND 🛑", "#F44336"
+    if price_vs_sma20 < 0:
+        return "DOWNTREND 📉", "#FF9800"
+    return "NEUTRAL ⚖️", "#9E9E9E"
+
+# Every sign combination resolved once; indexed by 9*(a+1) + 3*(b+1) + (c+1)
+_TREND_TABLE = tuple(
+    _trend_label(a, b, c) for a in (-1, 0, 1) for b in (-1, 0, 1) for c in (-1, 0, 1)
+)
+
+# Indicator columns kept for repeat calls on an unchanged close series
+_CACHE_SIZE = 64
+
+def _cached_indicators(func):
+    """Memoize indicator columns on a hash of close and its index, least recently used evicted"""
+    cache = OrderedDict()
+    lock = threading.Lock()
+    
+    @wraps(func)
+    def wrapper(df):
+        if df is None or df.empty or 'close' not in df:
+            return func(df)
+        
+        # Indicators only read close, so its values and index are the whole key
+        close_hash = int(pd.util.hash_pandas_object(df['close'], index=True).sum())
+        key = (len(df), close_hash, df.index[0], df.index[-1])
+        with lock:
+            columns = cache.get(key)
+            if columns is not None:
+                cache.move_to_end(key)
+        if columns is not None:
+            # Cached indicators go onto a copy of the caller's own OHLCV
+            result = df.fillna(0)
+            for col, values in columns.items():
+                result[col] = values
+            return result
+        
+        result = func(df)
+        if all(col in result for col in _FUSED_COLUMNS):
+            columns = {col: result[col].to_numpy(copy=True) for col in _FUSED_COLUMNS}
+            with lock:
+                cache[key] = columns
+                while len(cache) > _CACHE_SIZE:
+                    cache.popitem(last=False)
+        return result
+    
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+def _ema_filter(span):
+    """(b, a, decay) IIR coefficients for an adjust=False EMA of the given span"""
+    alpha = 2.0 / (span + 1.0)
+    return np.array([alpha]), np.array([1.0, alpha - 1.0]), 1.0 - alpha
+
+# Filters for the spans the chart, MACD and RSI(14) smoothing use, built once at import
+_EMA_FILTERS = {span: _ema_filter(span) for span in (9, 12, 20, 26, 27, 50)}
+
+def _ema_array(values, span):
+    """EMA matching ewm(span=span, adjust=False) on a float64 array"""
+    if NUMBA_AVAILABLE:
+        return _ema(values, span)
+    if lfilter is not None:
+        # y[i] = alpha*x[i] + (1-alpha)*y[i-1] as a C-level IIR filter, seeded so y[0] = x[0]
+        b, a, decay = _EMA_FILTERS.get(span) or _ema_filter(span)
+        ema, _ = lfilter(b, a, values, zi=[decay * values[0]])
+        return ema
+    return pd.Series(values).ewm(span=span, adjust=False, min_periods=1).mean().to_numpy()
+
 class TechnicalIndicators:
     """Calculate technical indicators"""
     
     @staticmethod
     def calculate_sma(data, window):
         """Simple Moving Average"""
-        try:
-            if data is None or len(data) < window:
-                return pd.Series(index=data.index) if data is not None else pd.Series()
-            return data.rolling(window=window, min_periods=1).mean()
-        except:
+        if data is None or len(data) < window:
             return pd.Series(index=data.index) if data is not None else pd.Series()
+        if NUMBA_AVAILABLE:
+            return pd.Series(_rolling_mean(data.to_numpy(dtype=np.float64), window), index=data.index)
+        if move_mean is not None:
+            return pd.Series(move_mean(data.to_numpy(dtype=np.float64), window, min_count=1), index=data.index)
+        return data.rolling(window=window, min_periods=1).mean()
     
     @staticmethod
     def calculate_ema(data, window):
         """Exponential Moving Average"""
-        try:
-            if data is None or len(data) < 2:
-                return pd.Series(index=data.index) if data is not None else pd.Series()
-            return data.ewm(span=window, adjust=False, min_periods=1).mean()
-        except:
+        if data is None or len(data) < 2:
             return pd.Series(index=data.index) if data is not None else pd.Series()
+        return pd.Series(_ema_array(data.to_numpy(dtype=np.float64), window), index=data.index)
     
     @staticmethod
     def calculate_rsi(data, window=14):
-        """Relative Strength Index"""
-        try:
-            if data is None or len(data) < window + 1:
-                return pd.Series(50, index=data.index) if data is not None else pd.Series()
-            
-            delta = data.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=window, min_periods=1).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=window, min_periods=1).mean()
-            
-            # Handle division by zero
-            rs = gain / loss.replace(0, np.nan)
-            rs = rs.fillna(0)
-            
-            rsi = 100 - (100 / (1 + rs))
-            return rsi.fillna(50)
-        except:
+        """Relative Strength Index with Wilder smoothing"""
+        if data is None or len(data) < window + 1:
             return pd.Series(50, index=data.index) if data is not None else pd.Series()
+        
+        close = data.to_numpy(dtype=np.float64)
+        if NUMBA_AVAILABLE:
+            return pd.Series(_rsi(close, window), index=data.index)
+        
+        # Wilder smoothing (alpha = 1/window) is an adjust=False EMA of span 2*window - 1
+        delta = np.diff(close)
+        avg_gain = _ema_array(np.maximum(delta, 0.0), 2 * window - 1)
+        avg_loss = _ema_array(np.maximum(-delta, 0.0), 2 * window - 1)
+        
+        # No losses reads 100, no movement at all 50
+        rs = np.divide(avg_gain, avg_loss, out=np.zeros_like(avg_gain), where=avg_loss > 0)
+        rsi = np.where(avg_loss > 0, 100 - 100 / (1 + rs), np.where(avg_gain > 0, 100.0, 50.0))
+        return pd.Series(np.concatenate(([50.0], rsi)), index=data.index)
     
     @staticmethod
     def calculate_macd(data, fast=12, slow=26, signal=9):
         """MACD Indicator"""
-        try:
-            if data is None or len(data) < slow:
-                empty = pd.Series(index=data.index) if data is not None else pd.Series()
-                return empty, empty, empty
-            
-            ema_fast = data.ewm(span=fast, adjust=False, min_periods=1).mean()
-            ema_slow = data.ewm(span=slow, adjust=False, min_periods=1).mean()
-            macd_line = ema_fast - ema_slow
-            signal_line = macd_line.ewm(span=signal, adjust=False, min_periods=1).mean()
-            histogram = macd_line - signal_line
-            
-            return macd_line.fillna(0), signal_line.fillna(0), histogram.fillna(0)
-        except:
-            empty = pd.Series(0, index=data.index) if data is not None else pd.Series()
+        if data is None or len(data) < slow:
+            empty = pd.Series(index=data.index) if data is not None else pd.Series()
             return empty, empty, empty
+        
+        close = data.to_numpy(dtype=np.float64)
+        macd_values = _ema_array(close, fast) - _ema_array(close, slow)
+        macd_line = pd.Series(macd_values, index=data.index)
+        signal_line = pd.Series(_ema_array(macd_values, signal), index=data.index)
+        histogram = macd_line - signal_line
+        
+        return macd_line, signal_line, histogram
     
     @staticmethod
+    @_cached_indicators
     def add_all_indicators(df):
         """Add all technical indicators"""
         if df is None or df.empty:
@@ -79,23 +171,29 @@ class TechnicalIndicators:
         result = df.copy()
         
         try:
-            # Moving Averages
-            result['SMA_20'] = TechnicalIndicators.calculate_sma(result['close'], 20)
-            result['SMA_50'] = TechnicalIndicators.calculate_sma(result['close'], 50)
-            result['EMA_12'] = TechnicalIndicators.calculate_ema(result['close'], 12)
-            result['EMA_26'] = TechnicalIndicators.calculate_ema(result['close'], 26)
-            
-            # MACD
-            macd, signal, hist = TechnicalIndicators.calculate_macd(result['close'])
-            result['MACD'] = macd
-            result['MACD_signal'] = signal
-            result['MACD_histogram'] = hist
-            
-            # RSI
-            result['RSI'] = TechnicalIndicators.calculate_rsi(result['close'])
+            if NUMBA_AVAILABLE:
+                # One compiled pass over close produces every indicator column
+                arrays = compute_all(result['close'].to_numpy(dtype=np.float64))
+                for col, values in zip(_FUSED_COLUMNS, arrays):
+                    result[col] = values
+            else:
+                # Moving Averages
+                result['SMA_20'] = TechnicalIndicators.calculate_sma(result['close'], 20)
+                result['SMA_50'] = TechnicalIndicators.calculate_sma(result['close'], 50)
+                result['EMA_12'] = TechnicalIndicators.calculate_ema(result['close'], 12)
+                result['EMA_26'] = TechnicalIndicators.calculate_ema(result['close'], 26)
+                
+                # MACD
+                macd, signal, hist = TechnicalIndicators.calculate_macd(result['close'])
+                result['MACD'] = macd
+                result['MACD_signal'] = signal
+                result['MACD_histogram'] = hist
+                
+                # RSI
+                result['RSI'] = TechnicalIndicators.calculate_rsi(result['close'])
             
-            # Fill any remaining NaN values
-            result = result.fillna(0)
+            # Fill any remaining NaN values, once for every column
+            result.fillna(0, inplace=True)
             
         except Exception as e:
             logger.error(f"Error adding indicators: {e}")
@@ -109,20 +207,27 @@ class TechnicalIndicators:
             if df is None or df.empty or 'close' not in df:
                 return "NO DATA", "#9E9E9E"
             
-            last_price = float(df['close'].iloc[-1]) if not pd.isna(df['close'].iloc[-1]) else 0
-            sma_20 = float(df['SMA_20'].iloc[-1]) if 'SMA_20' in df and not pd.isna(df['SMA_20'].iloc[-1]) else last_price
-            sma_50 = float(df['SMA_50'].iloc[-1]) if 'SMA_50' in df and not pd.isna(df['SMA_50'].iloc[-1]) else last_price
-            rsi = float(df['RSI'].iloc[-1]) if 'RSI' in df and not pd.isna(df['RSI'].iloc[-1]) else 50
+            # Last value straight off each column's array; missing columns read as NaN
+            last_price, sma_20, sma_50, rsi = (
+                float(df[col].to_numpy()[-1]) if col in df else math.nan for col in _TREND_COLUMNS
+            )
+            if math.isnan(last_price):
+                last_price = 0.0
+            if math.isnan(sma_20):
+                sma_20 = last_price
+            if math.isnan(sma_50):
+                sma_50 = last_price
+            if math.isnan(rsi):
+                rsi = 50.0
             
-            if last_price > sma_20 and sma_20 > sma_50 and rsi > 50:
-                return "STRONG UPTREND 🔥", "#4CAF50"
-            elif last_price > sma_20:
-                return "UPTREND 📈", "#8BC34A"
-            elif last_price < sma_20 and sma_20 < sma_50 and rsi < 50:
-                return "STRONG DOWNTREND 🛑", "#F44336"
-            elif last_price < sma_20:
-                return "DOWNTREND 📉", "#FF9800"
-            else:
-                return "NEUTRAL ⚖️", "#9E9E9E"
-        except:
+            # Signs of the comparisons pack into one table index
+            key = (
+                9 * ((last_price > sma_20) - (last_price < sma_20))
+                + 3 * ((sma_20 > sma_50) - (sma_20 < sma_50))
+                + ((rsi > 50) - (rsi < 50))
+                + 13
+            )
+            return _TREND_TABLE[key]
+        except Exception as e:
+            logger.error(f"Error detecting trend: {e}")
             return "NEUTRAL ⚖️", "#9E9E9E"
\ No newline at end of file
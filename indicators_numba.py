@@ -0,0 +1,173 @@
+"""
+Numba kernels for CryptoVerde technical indicators
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # optional, callers fall back to pandas
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True)
+def _rolling_mean(values, window):
+    """Trailing mean with min_periods=1, one value in and one out per step"""
+    n = len(values)
+    out = np.empty(n)
+    total = 0.0
+    for i in range(n):
+        total += values[i]
+        if i >= window:
+            total -= values[i - window]
+            out[i] = total / window
+        else:
+            out[i] = total / (i + 1)
+    return out
+
+@njit(cache=True)
+def _ema(values, span):
+    """EMA matching ewm(span=span, adjust=False)"""
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    alpha = 2.0 / (span + 1.0)
+    out[0] = values[0]
+    for i in range(1, n):
+        out[i] = alpha * values[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+@njit(cache=True)
+def _rsi_value(avg_gain, avg_loss):
+    """RSI from smoothed gain/loss; no losses reads 100, no movement at all 50"""
+    if avg_loss > 0:
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return 100.0 if avg_gain > 0 else 50.0
+
+@njit(cache=True)
+def _rsi(close, window):
+    """Wilder RSI: gains and losses smoothed with alpha = 1/window in one pass"""
+    n = len(close)
+    out = np.full(n, 50.0)
+    alpha = 1.0 / window
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, n):
+        d = close[i] - close[i - 1]
+        gain = d if d > 0 else 0.0
+        loss = -d if d < 0 else 0.0
+        if i == 1:
+            avg_gain = gain
+            avg_loss = loss
+        else:
+            avg_gain = alpha * gain + (1.0 - alpha) * avg_gain
+            avg_loss = alpha * loss + (1.0 - alpha) * avg_loss
+        out[i] = _rsi_value(avg_gain, avg_loss)
+    return out
+
+@njit(cache=True)
+def summary_stats(prices):
+    """Mean of the last 7 and 30 prices and population std of the last 7"""
+    n = len(prices)
+    n7 = min(n, 7)
+    n30 = min(n, 30)
+    sum7 = 0.0
+    sum30 = 0.0
+    for i in range(n - n30, n):
+        sum30 += prices[i]
+        if i >= n - n7:
+            sum7 += prices[i]
+    mean7 = sum7 / n7 if n7 > 0 else np.nan
+    mean30 = sum30 / n30 if n30 > 0 else np.nan
+    sq7 = 0.0
+    for i in range(n - n7, n):
+        sq7 += (prices[i] - mean7) ** 2
+    std7 = np.sqrt(sq7 / n7) if n7 > 0 else np.nan
+    return mean7, mean30, std7
+
+@njit(cache=True)
+def compute_all(close, sma_fast=20, sma_slow=50, ema_fast=12, ema_slow=26, signal=9, rsi_window=14):
+    """All chart indicators in one pass over close, already NaN-filled"""
+    n = len(close)
+    sma_f = np.zeros(n)
+    sma_s = np.zeros(n)
+    ema_f = np.zeros(n)
+    ema_s = np.zeros(n)
+    macd = np.zeros(n)
+    sig = np.zeros(n)
+    hist = np.zeros(n)
+    rsi = np.full(n, 50.0)
+    if n == 0:
+        return sma_f, sma_s, ema_f, ema_s, macd, sig, hist, rsi
+
+    # Indicators without enough history keep their fill value
+    has_sma_f = n >= sma_fast
+    has_sma_s = n >= sma_slow
+    has_ema = n >= 2
+    has_macd = n >= ema_slow
+    has_rsi = n >= rsi_window + 1
+
+    a_fast = 2.0 / (ema_fast + 1.0)
+    a_slow = 2.0 / (ema_slow + 1.0)
+    a_sig = 2.0 / (signal + 1.0)
+
+    a_rsi = 1.0 / rsi_window
+
+    sum_f = 0.0
+    sum_s = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+    e_f = close[0]
+    e_s = close[0]
+    e_sig = 0.0
+
+    for i in range(n):
+        x = close[i]
+
+        # Running window sums
+        sum_f += x
+        if i >= sma_fast:
+            sum_f -= close[i - sma_fast]
+        sum_s += x
+        if i >= sma_slow:
+            sum_s -= close[i - sma_slow]
+        if has_sma_f:
+            sma_f[i] = sum_f / min(i + 1, sma_fast)
+        if has_sma_s:
+            sma_s[i] = sum_s / min(i + 1, sma_slow)
+
+        # EMA recurrences, MACD and its signal line
+        if i > 0:
+            e_f = a_fast * x + (1.0 - a_fast) * e_f
+            e_s = a_slow * x + (1.0 - a_slow) * e_s
+        if has_ema:
+            ema_f[i] = e_f
+            ema_s[i] = e_s
+        m = e_f - e_s
+        e_sig = m if i == 0 else a_sig * m + (1.0 - a_sig) * e_sig
+        if has_macd:
+            macd[i] = m
+            sig[i] = e_sig
+            hist[i] = m - e_sig
+
+        # Wilder-smoothed gain/loss; the first move seeds both averages
+        if i > 0:
+            d = x - close[i - 1]
+            gain = d if d > 0 else 0.0
+            loss = -d if d < 0 else 0.0
+            if i == 1:
+                avg_gain = gain
+                avg_loss = loss
+            else:
+                avg_gain = a_rsi * gain + (1.0 - a_rsi) * avg_gain
+                avg_loss = a_rsi * loss + (1.0 - a_rsi) * avg_loss
+            if has_rsi:
+                rsi[i] = _rsi_value(avg_gain, avg_loss)
+
+    return sma_f, sma_s, ema_f, ema_s, macd, sig, hist, rsi
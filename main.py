@@ -7,6 +7,11 @@ from dashboard import CryptoDashboard
 from scheduler import SchedulerManager
 import logging
 from utils import setup_directories
+import pandas as pd
+
+# Copy-on-Write lets derived frames share column buffers until modified; always on from pandas 3
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
 
 # Setup logging
 logging.basicConfig(
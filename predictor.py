@@ -9,11 +9,39 @@ import logging
 from datetime import datetime, timedelta
 import joblib
 import os
+from concurrent.futures import ThreadPoolExecutor
 import plotly.graph_objects as go
 import streamlit as st
+from indicators_numba import summary_stats
 
 logger = logging.getLogger("CryptoVerde.Predictor")
 
+# Model input order; the fallback is another coin_data key (str) or a constant
+FEATURE_SPEC = (
+    ('price_lag_1', 'current_price'),
+    ('price_lag_2', 'current_price'),
+    ('price_lag_3', 'current_price'),
+    ('price_lag_7', 'current_price'),
+    ('price_ma_7', 'current_price'),
+    ('price_ma_30', 'current_price'),
+    ('price_std_7', 0),
+    ('volatility', 0),
+    ('rsi', 50),
+    ('macd', 0),
+    ('volume_lag_1', 'total_volume'),
+    ('volume_ma_7', 'total_volume')
+)
+FEATURE_NAMES = [name for name, _ in FEATURE_SPEC]
+
+# One record per predicted day; dates are derived from day when rendering
+PREDICTION_DTYPE = np.dtype([
+    ('day', 'i4'),
+    ('predicted_price', 'f8'),
+    ('confidence', 'f8'),
+    ('change_percent', 'f8'),
+    ('trend_up', '?')
+])
+
 class CryptoPredictor:
     """Predicts future prices using trained models"""
     
@@ -21,55 +49,81 @@ class CryptoPredictor:
         self.db = db_manager
         self.trainer = model_trainer
         self.model_dir = "trained_models"
+        # coin_id -> (file stamp, model, scaler) of successful loads; misses are retried on disk
+        self._models = {}
     
-    def prepare_prediction_features(self, coin_data, days=10):
-        """Prepare features for prediction"""
+    def _model_stamp(self, coin_id):
+        """Names and mtimes of the coin's model files, so a retrained model invalidates the cache"""
+        model_dir = getattr(self.trainer, 'model_dir', self.model_dir)
         try:
-            df = pd.DataFrame([coin_data])
-            
-            # Create features matching training data
-            features = {
-                'price_lag_1': coin_data.get('price_lag_1', coin_data['current_price']),
-                'price_lag_2': coin_data.get('price_lag_2', coin_data['current_price']),
-                'price_lag_3': coin_data.get('price_lag_3', coin_data['current_price']),
-                'price_lag_7': coin_data.get('price_lag_7', coin_data['current_price']),
-                'price_ma_7': coin_data.get('price_ma_7', coin_data['current_price']),
-                'price_ma_30': coin_data.get('price_ma_30', coin_data['current_price']),
-                'price_std_7': coin_data.get('price_std_7', 0),
-                'volatility': coin_data.get('volatility', 0),
-                'rsi': coin_data.get('rsi', 50),
-                'macd': coin_data.get('macd', 0),
-                'volume_lag_1': coin_data.get('volume_lag_1', coin_data['total_volume']),
-                'volume_ma_7': coin_data.get('volume_ma_7', coin_data['total_volume'])
-            }
+            with os.scandir(model_dir) as entries:
+                return tuple(sorted(
+                    (entry.name, entry.stat().st_mtime_ns)
+                    for entry in entries if entry.name.startswith(coin_id)
+                ))
+        except OSError:
+            return ()
+    
+    def _load_model(self, coin_id):
+        """Load a coin's model, rejecting scalers fitted on other feature columns"""
+        stamp = self._model_stamp(coin_id)
+        cached = self._models.get(coin_id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+        
+        model, scaler = self.trainer.load_model(coin_id)
+        names = getattr(scaler, 'feature_names_in_', None)
+        if names is not None and list(names) != FEATURE_NAMES:
+            logger.error(f"❌ Feature mismatch for {coin_id}: model expects {list(names)}")
+            return None, None
+        if model is not None:
+            self._models[coin_id] = (stamp, model, scaler)
+        return model, scaler
+    
+    def clear_model_cache(self):
+        """Forget loaded models, e.g. after the trainer saves new ones"""
+        self._models.clear()
+    
+    def prepare_prediction_features(self, coin_data, days=10, out=None):
+        """Prepare a (1, n_features) feature row for prediction, filling out when given"""
+        try:
+            # Create features matching training data, in FEATURE_SPEC order
+            if out is None:
+                out = np.empty((1, len(FEATURE_SPEC)), dtype=np.float64)
+            row = out[0]
+            for i, (name, fallback) in enumerate(FEATURE_SPEC):
+                default = coin_data[fallback] if isinstance(fallback, str) else fallback
+                row[i] = coin_data.get(name, default)
             
-            return pd.DataFrame([features])
+            return out
             
         except Exception as e:
             logger.error(f"❌ Error preparing features: {e}")
             return None
     
-    def predict_next_10_days(self, coin_id):
-        """Predict prices for next 10 days"""
+    def predict_next_10_days(self, coin_id, coin_data=None):
+        """Predict prices for next 10 days as a PREDICTION_DTYPE array; coin_data skips the coin lookup"""
         try:
             # Load model
-            model, scaler = self.trainer.load_model(coin_id)
+            model, scaler = self._load_model(coin_id)
             if model is None:
                 return None
             
             # Get latest coin data
-            coins = self.db.get_coins()
-            if not coins:
-                return None
-            
-            df = pd.DataFrame(coins)
-            coin_data_df = df[df['coin_id'] == coin_id]
-            
-            if coin_data_df.empty:
-                logger.error(f"❌ No data for {coin_id}")
-                return None
-            
-            coin_data = coin_data_df.iloc[0].to_dict()
+            if coin_data is None:
+                df = self.db.get_coins()
+                if df.empty:
+                    return None
+                
+                coin_data_df = df[df['coin_id'] == coin_id]
+                
+                if coin_data_df.empty:
+                    logger.error(f"❌ No data for {coin_id}")
+                    return None
+                
+                coin_data = coin_data_df.iloc[0].to_dict()
+            else:
+                coin_data = dict(coin_data)
             
             # Get historical data for feature calculation
             historical = self.db.get_historical_data(coin_id, days=30)
@@ -78,30 +132,39 @@ class CryptoPredictor:
             # Calculate rolling features
             if not hist_df.empty:
                 hist_df = hist_df.sort_values('extracted_at')
-                prices = hist_df['current_price'].tolist() + [coin_data['current_price']]
+                prices = np.append(hist_df['current_price'].to_numpy(dtype=np.float64), coin_data['current_price'])
+                n = len(prices)
+                mean_7, mean_30, std_7 = summary_stats(prices)
                 
                 # Calculate features
-                coin_data['price_lag_1'] = prices[-2] if len(prices) > 1 else coin_data['current_price']
-                coin_data['price_lag_2'] = prices[-3] if len(prices) > 2 else coin_data['current_price']
-                coin_data['price_lag_3'] = prices[-4] if len(prices) > 3 else coin_data['current_price']
-                coin_data['price_lag_7'] = prices[-8] if len(prices) > 8 else coin_data['current_price']
+                coin_data['price_lag_1'] = prices[-2] if n > 1 else coin_data['current_price']
+                coin_data['price_lag_2'] = prices[-3] if n > 2 else coin_data['current_price']
+                coin_data['price_lag_3'] = prices[-4] if n > 3 else coin_data['current_price']
+                coin_data['price_lag_7'] = prices[-8] if n > 8 else coin_data['current_price']
                 
-                coin_data['price_ma_7'] = np.mean(prices[-7:]) if len(prices) >= 7 else coin_data['current_price']
-                coin_data['price_ma_30'] = np.mean(prices[-30:]) if len(prices) >= 30 else coin_data['current_price']
-                coin_data['price_std_7'] = np.std(prices[-7:]) if len(prices) >= 7 else 0
+                coin_data['price_ma_7'] = mean_7 if n >= 7 else coin_data['current_price']
+                coin_data['price_ma_30'] = mean_30 if n >= 30 else coin_data['current_price']
+                coin_data['price_std_7'] = std_7 if n >= 7 else 0
             
-            predictions = []
+            predictions = np.zeros(10, dtype=PREDICTION_DTYPE)
+            filled = 0
             current_data = coin_data.copy()
+            # One feature row reused across days instead of a DataFrame per step
+            features = np.empty((1, len(FEATURE_SPEC)), dtype=np.float64)
+            # Scalers fitted on named columns get a frame viewing that same row
+            if hasattr(scaler, 'feature_names_in_'):
+                scaler_input = pd.DataFrame(features, columns=FEATURE_NAMES, copy=False)
+            else:
+                scaler_input = features
             
             # Predict next 10 days iteratively
             for day in range(1, 11):
                 # Prepare features
-                features_df = self.prepare_prediction_features(current_data)
-                if features_df is None:
+                if self.prepare_prediction_features(current_data, out=features) is None:
                     break
                 
                 # Scale features
-                features_scaled = scaler.transform(features_df)
+                features_scaled = scaler.transform(scaler_input)
                 
                 # Predict
                 predicted_price = model.predict(features_scaled)[0]
@@ -109,16 +172,14 @@ class CryptoPredictor:
                 # Calculate confidence based on model metrics
                 confidence = min(95, max(60, 100 - (abs(predicted_price - coin_data['current_price']) / coin_data['current_price'] * 100)))
                 
-                prediction_date = datetime.now() + timedelta(days=day)
-                
-                predictions.append({
-                    'day': day,
-                    'date': prediction_date.strftime('%Y-%m-%d'),
-                    'predicted_price': float(predicted_price),
-                    'confidence': confidence,
-                    'trend': 'up' if predicted_price > current_data['current_price'] else 'down',
-                    'change_percent': ((predicted_price - coin_data['current_price']) / coin_data['current_price']) * 100
-                })
+                predictions[filled] = (
+                    day,
+                    predicted_price,
+                    confidence,
+                    ((predicted_price - coin_data['current_price']) / coin_data['current_price']) * 100,
+                    predicted_price > current_data['current_price']
+                )
+                filled += 1
                 
                 # Update current data for next prediction
                 current_data['current_price'] = predicted_price
@@ -126,7 +187,7 @@ class CryptoPredictor:
                 current_data['price_lag_2'] = current_data['price_lag_1']
                 current_data['price_lag_1'] = predicted_price
             
-            return predictions
+            return predictions[:filled]
             
         except Exception as e:
             logger.error(f"❌ Prediction failed for {coin_id}: {e}")
@@ -136,55 +197,68 @@ class CryptoPredictor:
         """Get summary of predictions"""
         predictions = self.predict_next_10_days(coin_id)
         
-        if not predictions:
+        if predictions is None or len(predictions) == 0:
             return None
         
-        df = pd.DataFrame(predictions)
+        # Aggregate the prediction columns directly rather than through a DataFrame
+        count = len(predictions)
+        prices = predictions['predicted_price']
+        total_change = float(predictions['change_percent'][-1])
         
         summary = {
             'coin_id': coin_id,
-            'current_price': predictions[0]['predicted_price'] if len(predictions) > 1 else 0,
-            'predicted_price_10d': predictions[-1]['predicted_price'],
-            'total_change': predictions[-1]['change_percent'],
-            'avg_confidence': df['confidence'].mean(),
-            'max_price': df['predicted_price'].max(),
-            'min_price': df['predicted_price'].min(),
-            'volatility': df['predicted_price'].std(),
-            'trend': 'BULLISH' if predictions[-1]['change_percent'] > 5 else 'BEARISH' if predictions[-1]['change_percent'] < -5 else 'NEUTRAL'
+            'current_price': float(prices[0]) if count > 1 else 0,
+            'predicted_price_10d': float(prices[-1]),
+            'total_change': total_change,
+            'avg_confidence': float(predictions['confidence'].mean()),
+            'max_price': float(prices.max()),
+            'min_price': float(prices.min()),
+            'volatility': float(prices.std(ddof=1)) if count > 1 else np.nan,
+            'trend': 'BULLISH' if total_change > 5 else 'BEARISH' if total_change < -5 else 'NEUTRAL'
         }
         
         return summary
     
     def get_all_predictions(self, top_n=10):
         """Get predictions for top N coins"""
-        coins = self.db.get_coins()
-        if not coins:
+        df = self.db.get_coins()
+        if df.empty:
             return None
         
-        df = pd.DataFrame(coins)
-        top_coins = df.nlargest(top_n, 'market_cap')
+        # Coins are fetched once here and handed down, not refetched per coin
+        coins = df.nlargest(top_n, 'market_cap').to_dict('records')
         
-        all_predictions = []
+        # Coins are independent, so predict them concurrently; map keeps market cap order
+        if len(coins) > 1:
+            workers = min(len(coins), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._predict_one, coins))
+        else:
+            results = [self._predict_one(coin) for coin in coins]
         
-        for _, coin in top_coins.iterrows():
-            predictions = self.predict_next_10_days(coin['coin_id'])
-            if predictions:
-                all_predictions.append({
-                    'coin_id': coin['coin_id'],
-                    'name': coin['name'],
-                    'symbol': coin['symbol'],
-                    'current_price': coin['current_price'],
-                    'predictions': predictions
-                })
+        return [result for result in results if result is not None]
+    
+    def _predict_one(self, coin):
+        """Predictions for one coin row with its metadata, None when there are none"""
+        predictions = self.predict_next_10_days(coin['coin_id'], coin_data=coin)
+        if predictions is None or len(predictions) == 0:
+            return None
         
-        return all_predictions
+        return {
+            'coin_id': coin['coin_id'],
+            'name': coin['name'],
+            'symbol': coin['symbol'],
+            'current_price': coin['current_price'],
+            'predictions': predictions
+        }
     
     def render_prediction_chart(self, predictions, coin_name, historical_data=None):
         """Render prediction chart with plotly"""
-        if not predictions:
+        if predictions is None or len(predictions) == 0:
             return None
         
-        pred_df = pd.DataFrame(predictions)
+        prices = predictions['predicted_price']
+        confidences = predictions['confidence']
         
         fig = go.Figure()
         
@@ -200,22 +274,24 @@ class CryptoPredictor:
             ))
         
         # Add predictions
-        pred_dates = [datetime.now() + timedelta(days=d) for d in range(1, 11)]
+        now = datetime.now()
+        pred_dates = [now + timedelta(days=int(day)) for day in predictions['day']]
         
         fig.add_trace(go.Scatter(
             x=pred_dates,
-            y=pred_df['predicted_price'],
+            y=prices,
             mode='lines+markers',
             name='Predicted',
             line=dict(color='#4CAF50', width=3, dash='dash'),
             marker=dict(size=8)
         ))
         
-        # Add confidence bands
+        # Add confidence bands: upper edge forward, lower edge back, in one array
+        spread = prices * (100 - confidences) / 100
+        band = np.concatenate((prices + spread, (prices - spread)[::-1]))
         fig.add_trace(go.Scatter(
             x=pred_dates + pred_dates[::-1],
-            y=list(pred_df['predicted_price'] * (1 + (100 - pred_df['confidence'])/100)) + 
-              list(pred_df['predicted_price'] * (1 - (100 - pred_df['confidence'])/100))[::-1],
+            y=band,
             fill='toself',
             fillcolor='rgba(76, 175, 80, 0.2)',
             line=dict(color='rgba(255,255,255,0)'),
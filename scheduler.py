@@ -3,7 +3,6 @@ Background scheduler for CryptoVerde
 """
 
 import threading
-import time
 import logging
 from etl_pipeline import ETLPipeline
 from config import Config
@@ -15,7 +14,8 @@ class SchedulerManager:
     
     def __init__(self):
         self.etl = ETLPipeline()
-        self.running = True
+        # Set by stop(); waiting on it wakes the loop immediately on shutdown
+        self._stop = threading.Event()
         self.thread = None
     
     def start(self):
@@ -26,23 +26,20 @@ class SchedulerManager:
     
     def _run_scheduler(self):
         """Run scheduler loop"""
-        while self.running:
+        while not self._stop.is_set():
             try:
                 # Run ETL
                 self.etl.run()
                 
                 # Wait for next interval
-                for _ in range(Config.ETL_INTERVAL_SECONDS):
-                    if not self.running:
-                        break
-                    time.sleep(1)
+                self._stop.wait(Config.ETL_INTERVAL_SECONDS)
             except Exception as e:
                 logger.error(f"Scheduler error: {e}")
-                time.sleep(60)
+                self._stop.wait(60)
     
     def stop(self):
         """Stop scheduler"""
-        self.running = False
+        self._stop.set()
         if self.thread:
             self.thread.join(timeout=5)
         logger.info("⏹️ Scheduler stopped")
\ No newline at end of file
@@ -8,8 +8,19 @@ import logging
 from datetime import datetime
 from config import Config
 
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
 logger = logging.getLogger("CryptoVerde.Utils")
 
+# Indented like the json.dump fallback; numpy values and non-str keys are written natively
+_ORJSON_FILE_OPTIONS = (
+    orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if orjson is not None else 0
+)
+
 def setup_directories():
     """Create necessary directories"""
     os.makedirs(Config.RAW_DATA_DIR, exist_ok=True)
@@ -17,8 +28,12 @@ def setup_directories():
 def save_json(data, filename):
     """Save data as JSON"""
     try:
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(data, default=str, option=_ORJSON_FILE_OPTIONS))
+        else:
+            with open(filename, 'w') as f:
+                json.dump(data, f, indent=2, default=str)
         return True
     except Exception as e:
         logger.error(f"Failed to save JSON: {e}")
@@ -28,13 +43,19 @@ def load_json(filename):
     """Load data from JSON"""
     try:
         if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                return json.load(f)
+            with open(filename, 'rb') as f:
+                return json_loads(f.read())
         return {}
     except Exception as e:
         logger.error(f"Failed to load JSON: {e}")
         return {}
 
+def json_loads(data):
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def format_timestamp(dt=None):
     """Format timestamp for filenames"""
     if dt is None: